@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for production
+
+    gunicorn src.main:app
+
+Runs several Uvicorn worker processes. UvicornWorker picks uvloop and
+httptools automatically (both come with uvicorn[standard]).
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Parsing is CPU-bound, so one worker per core (not the usual 2 x CPUs + 1)
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# OCR can run for a while on long scanned statements
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Parse slots and the OCR thread pool are per process; share the cores
+# between workers instead of giving every worker all of them. Each worker
+# still gets at least two, so a statement's pages OCR in parallel and a slow
+# OCR doesn't hold up every other upload to that worker
+_cores_per_worker = str(max(2, multiprocessing.cpu_count() // workers))
+os.environ.setdefault("PARSE_CONCURRENCY", _cores_per_worker)
+os.environ.setdefault("OCR_WORKERS", _cores_per_worker)
+
+# Every worker has its own connection pool; split DB_MAX_CONNECTIONS (keep it
+# below the server's max_connections, 100 by default on PostgreSQL) between
+# them, half kept open and half as overflow
+_connections_per_worker = max(2, int(os.getenv("DB_MAX_CONNECTIONS", "90")) // workers)
+os.environ.setdefault("DB_POOL_SIZE", str(_connections_per_worker // 2))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(_connections_per_worker - _connections_per_worker // 2))
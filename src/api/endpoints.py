@@ -1,27 +1,207 @@
 """FastAPI endpoints for bank statement processing"""
 
+import asyncio
+import errno
+import hashlib
+import math
 import os
+import shutil
 import tempfile
-from typing import Annotated, List, Optional
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Annotated, List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, Response, status
+import pdfplumber
+from pydantic import TypeAdapter
+from sqlalchemy import case, desc, func, select, update
+from sqlalchemy.orm import Session, selectinload
 
 from ..models import (ParseResponse, ConfirmRequest, ConfirmResponse, ErrorResponse,
                       Transaction, Category, CategoryUpdate, TransactionEdit, TransactionUpdate,
                       SuggestionRequest, SuggestionResponse)
-from ..parsers import parse_bank_statement
+from ..parsers import shared_parser, parse_bank_statement_async
 from ..db import (
     get_db,
-    calculate_file_hash,
+    calculate_content_hash,
     get_currency_code,
     create_statement,
     bulk_insert_transactions,
-    check_duplicate_statement
+    check_duplicate_statement,
+    check_duplicate_statements,
+    check_duplicate_content,
+    check_duplicate_contents
 )
-from ..services import CategorizationService
+from ..db.models import Statement, StagingTransaction
+from ..services import CategorizationService, ParseCache
 
 router = APIRouter(prefix="/api/statements", tags=["statements"])
 
+# Uploads are streamed to disk in chunks of this size (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Every PDF starts with this header
+PDF_MAGIC = b'%PDF-'
+
+# Uploads up to this size (8 MiB, the common case) are spooled to a RAM-backed
+# tmpfs when one is available; larger files go to the default temp dir. The
+# cap is per file: many queued uploads can still fill the tmpfs, so uploads
+# that hit a full tmpfs are moved to the default temp dir (see _spool_upload)
+SPOOL_MEMORY_MAX_SIZE = 8 << 20
+UPLOAD_MEMORY_DIR = os.getenv("UPLOAD_MEMORY_DIR", "/dev/shm")
+
+# Validates/serializes whole transaction lists in one pydantic-core call
+_TRANSACTION_LIST = TypeAdapter(List[Transaction])
+
+# Editable Transaction fields the parser doesn't produce, with their schema
+# defaults; merged into parser dicts so batch previews keep the same shape
+_PREVIEW_DEFAULTS = {
+    'original_description': None,
+    'category_id': None,
+    'category_name': None,
+    'is_edited': False
+}
+
+# Maximum number of statements parsed at once; further requests wait up to
+# PARSE_QUEUE_TIMEOUT seconds for a free slot before being rejected with 429
+PARSE_CONCURRENCY = int(os.getenv("PARSE_CONCURRENCY", os.cpu_count() or 1))
+PARSE_QUEUE_TIMEOUT = float(os.getenv("PARSE_QUEUE_TIMEOUT", "30"))
+_parse_semaphore = asyncio.Semaphore(PARSE_CONCURRENCY)
+
+# Recently parsed statements, keyed by (file_hash, use_ocr)
+_parse_cache = ParseCache(maxsize=64, ttl=600)
+
+
+@asynccontextmanager
+async def _parse_slot(queue_timeout: Optional[float] = PARSE_QUEUE_TIMEOUT):
+    """
+    Hold one of the PARSE_CONCURRENCY parse slots, or fail with HTTP 429.
+
+    queue_timeout=None waits for a slot however long it takes (no 429).
+    """
+    try:
+        await asyncio.wait_for(_parse_semaphore.acquire(), timeout=queue_timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many statements are being parsed, please retry shortly",
+            headers={"Retry-After": str(int(PARSE_QUEUE_TIMEOUT))}
+        )
+
+    try:
+        yield
+    finally:
+        _parse_semaphore.release()
+
+
+async def _parse_cached(file_hash: str, tmp_path: str, bank_name: str, use_ocr: bool,
+                        queue_timeout: Optional[float] = PARSE_QUEUE_TIMEOUT) -> dict:
+    """
+    Parse a spooled statement in a worker thread, holding a parse slot
+    (see _parse_slot for queue_timeout).
+
+    Re-uploads of a recently parsed file are served from the cache, also
+    when they name a different bank: the bank name is only echoed back.
+    """
+    cache_key = (file_hash, use_ocr)
+    result = _parse_cache.get(cache_key)
+    if result is None:
+        async with _parse_slot(queue_timeout):
+            result = await parse_bank_statement_async(tmp_path, bank_name, use_ocr=use_ocr)
+        _parse_cache.set(cache_key, result)
+    elif result['bank_name'] != bank_name:
+        result = {**result, 'bank_name': bank_name}
+    return result
+
+
+def _write_all(fd: int, data: memoryview) -> memoryview:
+    """
+    Write data to fd, returning what is left unwritten if the device fills up.
+
+    os.write may write only part of its input, so this tracks exactly how
+    much reached the file.
+    """
+    while data:
+        try:
+            data = data[os.write(fd, data):]
+        except OSError as e:
+            if e.errno != errno.ENOSPC:
+                raise
+            return data
+    return data
+
+
+def _spill_to_disk(fd: int, path: str) -> Tuple[int, str]:
+    """Move a partly spooled upload to a new file in the default temp dir"""
+    disk_fd, disk_path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with open(path, 'rb') as spooled, open(disk_fd, 'wb', closefd=False) as disk_file:
+            shutil.copyfileobj(spooled, disk_file)
+    except BaseException:
+        os.close(disk_fd)
+        os.unlink(disk_path)
+        raise
+
+    os.close(fd)
+    os.unlink(path)
+    return disk_fd, disk_path
+
+
+async def _spool_upload(file: UploadFile) -> Tuple[str, str]:
+    """
+    Stream an uploaded PDF to a temporary file, hashing it on the way.
+
+    Only one chunk is held in memory at a time, so memory use stays flat
+    regardless of the size of the statement, and hashing/writing run in a
+    worker thread so large uploads don't stall the event loop. Small files
+    land on tmpfs so the parser reads them back from memory, not disk; if
+    the tmpfs fills up mid-upload, the file moves to the default temp dir.
+
+    Returns:
+        Tuple of (SHA-256 hex digest, temporary file path)
+    """
+    tmp_dir = None
+    if (file.size is not None and file.size <= SPOOL_MEMORY_MAX_SIZE
+            and os.path.isdir(UPLOAD_MEMORY_DIR)):
+        tmp_dir = UPLOAD_MEMORY_DIR
+
+    hasher = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf', dir=tmp_dir)
+
+    def consume(chunk: bytes) -> None:
+        nonlocal fd, tmp_path, tmp_dir
+        hasher.update(chunk)
+        unwritten = _write_all(fd, memoryview(chunk))
+        if unwritten and tmp_dir is not None:
+            # Other uploads and OCR pages share the tmpfs; carry on on disk
+            fd, tmp_path = _spill_to_disk(fd, tmp_path)
+            tmp_dir = None
+            unwritten = _write_all(fd, unwritten)
+        if unwritten:
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), tmp_path)
+
+    try:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+        # Reject misnamed non-PDF uploads before writing anything. The
+        # spec lets the header start anywhere in the first 1024 bytes.
+        if PDF_MAGIC not in chunk[:1024]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file is not a valid PDF"
+            )
+
+        while chunk:
+            # Hash + disk write happen off the event loop
+            await asyncio.to_thread(consume, chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        os.close(fd)
+
+    return hasher.hexdigest(), tmp_path
+
 
 @router.post("/parse", response_model=ParseResponse)
 async def parse_statement(
@@ -53,37 +233,43 @@ async def parse_statement(
         )
 
     try:
-        # Read file content
-        content = await file.read()
+        # Stream upload to a temporary file for pdfplumber, hashing as we go
+        file_hash, tmp_path = await _spool_upload(file)
 
-        # Check for duplicate
-        file_hash = calculate_file_hash(content)
-        if check_duplicate_statement(db, file_hash):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="This statement has already been imported (duplicate file hash)"
-            )
+        try:
+            # Check for duplicate
+            if check_duplicate_statement(db, file_hash):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="This statement has already been imported (duplicate file hash)"
+                )
 
-        # Save to temporary file for pdfplumber
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+            # Parse the statement with OCR support off the event loop
+            result = await _parse_cached(file_hash, tmp_path, bank_name, use_ocr)
 
-        try:
-            # Parse the statement with OCR support
-            result = parse_bank_statement(tmp_path, bank_name, use_ocr=use_ocr)
+            txns = result['transactions']
+
+            # Catch re-exports of an imported statement (different bytes,
+            # same transactions)
+            if check_duplicate_content(db, calculate_content_hash(txns)):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="This statement has already been imported (matching transactions)"
+                )
 
             # Calculate total amount
-            total_amount = sum(txn['amount'] for txn in result['transactions'])
+            total_amount = math.fsum(txn['amount'] for txn in txns)
 
-            # Build response
+            # Build response; the dicts come from our own parser, so the
+            # models are constructed without re-validating every field
             response = ParseResponse(
                 bank_name=result['bank_name'],
                 statement_date=result['statement_date'],
                 transaction_count=result['transaction_count'],
-                transactions=[Transaction(**txn) for txn in result['transactions']],
+                transactions=[Transaction.model_construct(**txn) for txn in txns],
                 total_amount=total_amount,
-                ocr_used=result.get('ocr_used', False)
+                ocr_used=result.get('ocr_used', False),
+                file_hash=file_hash
             )
 
             return response
@@ -119,24 +305,40 @@ async def confirm_statement(
     Called after user reviews and approves the preview from /parse.
     """
     try:
+        # The file was hashed during /parse; re-check it in case the same PDF
+        # was confirmed in the meantime
+        if check_duplicate_statement(db, request.file_hash):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This statement has already been imported (duplicate file hash)"
+            )
+
+        # Bulk-insert rows are dumped once and reused for the fingerprint
+        transactions_data = _TRANSACTION_LIST.dump_python(request.transactions)
+
+        # Reject statements whose transactions were already imported
+        content_hash = calculate_content_hash(transactions_data)
+        if check_duplicate_content(db, content_hash):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This statement has already been imported (matching transactions)"
+            )
+
         # Get currency code from tax entity
         currency_code = get_currency_code(db, request.tax_entity_id)
 
         # Create statement record
-        # Note: file_hash is not available here (not sent in confirm request)
-        # In production, you'd want to include it in the preview response
-        # and send it back in the confirm request
         statement = create_statement(
             db=db,
             tax_entity_id=request.tax_entity_id,
             bank_name=request.bank_name,
             statement_date=request.statement_date,
-            file_hash="",  # Would be passed from parse response in production
-            transaction_count=len(request.transactions)
+            file_hash=request.file_hash,
+            transaction_count=len(request.transactions),
+            content_hash=content_hash
         )
 
         # Bulk insert transactions
-        transactions_data = [txn.model_dump() for txn in request.transactions]
         inserted_count = bulk_insert_transactions(
             db=db,
             statement_id=statement.id,
@@ -151,6 +353,8 @@ async def confirm_statement(
             message=f"Successfully imported {inserted_count} transactions"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -159,10 +363,46 @@ async def confirm_statement(
         )
 
 
+# Static health payload, serialized once at import
+_HEALTH_BODY = b'{"status":"ok","service":"bank-statement-parser"}'
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "ok", "service": "bank-statement-parser"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+def _debug_extract(pdf_path: str, use_ocr: bool) -> dict:
+    """Collect raw text lines and table structure for /debug-parse"""
+    # Get raw text lines
+    raw_lines = shared_parser.extract_text_lines(pdf_path, force_ocr=use_ocr)
+
+    # Extract table structure
+    tables_data = []
+    # Only the first 3 pages are loaded; each page's layout objects are
+    # released once its tables are extracted
+    with pdfplumber.open(pdf_path, pages=[1, 2, 3]) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            tables = page.extract_tables()
+            page.close()
+            if tables:
+                for table_num, table in enumerate(tables, 1):
+                    tables_data.append({
+                        "page": page_num,
+                        "table_num": table_num,
+                        "rows": len(table),
+                        "columns": len(table[0]) if table else 0,
+                        "headers": table[0] if table else [],
+                        "data": table[1:20] if len(table) > 1 else []  # First 20 rows
+                    })
+
+    return {
+        "raw_lines": raw_lines,
+        "total_lines": len(raw_lines),
+        "tables": tables_data,
+        "tables_found": len(tables_data)
+    }
 
 
 @router.post("/debug-parse")
@@ -182,47 +422,20 @@ async def debug_parse_statement(
         )
 
     try:
-        content = await file.read()
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        _, tmp_path = await _spool_upload(file)
 
         try:
-            import pdfplumber
-            from ..parsers.transaction_detector import TransactionDetector
-
-            # Get raw text lines
-            detector = TransactionDetector()
-            raw_lines = detector.extract_text_from_pdf(tmp_path, use_ocr=use_ocr)
-
-            # Extract table structure
-            tables_data = []
-            with pdfplumber.open(tmp_path) as pdf:
-                for page_num, page in enumerate(pdf.pages[:3], 1):  # First 3 pages
-                    tables = page.extract_tables()
-                    if tables:
-                        for table_num, table in enumerate(tables, 1):
-                            tables_data.append({
-                                "page": page_num,
-                                "table_num": table_num,
-                                "rows": len(table),
-                                "columns": len(table[0]) if table else 0,
-                                "headers": table[0] if table else [],
-                                "data": table[1:20] if len(table) > 1 else []  # First 20 rows
-                            })
-
-            return {
-                "raw_lines": raw_lines,
-                "total_lines": len(raw_lines),
-                "tables": tables_data,
-                "tables_found": len(tables_data)
-            }
+            # Text extraction, OCR and table detection are all blocking; run
+            # them in a worker thread under the same limit as /parse
+            async with _parse_slot():
+                return await asyncio.to_thread(_debug_extract, tmp_path, use_ocr)
 
         finally:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -248,69 +461,142 @@ async def parse_batch_statements(
 
     Returns a list of ParseResponse objects, one per statement.
     User reviews all statements before confirming via /confirm endpoint.
+
+    All uploads are spooled and hashed first, duplicates (already imported or
+    repeated within the batch) are filtered with a single query, and the
+    remaining statements are parsed concurrently.
     """
     results = []
     errors = []
+    spooled = []
 
-    for file in files:
-        # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            errors.append({
-                "filename": file.filename,
-                "error": "Only PDF files are supported"
-            })
-            continue
-
-        try:
-            # Read file content
-            content = await file.read()
+    try:
+        # Phase 1: validate and stream every upload to disk, hashing as we go
+        for file in files:
+            # Validate file type
+            if not file.filename.lower().endswith('.pdf'):
+                errors.append({
+                    "filename": file.filename,
+                    "error": "Only PDF files are supported"
+                })
+                continue
 
-            # Check for duplicate
-            file_hash = calculate_file_hash(content)
-            if check_duplicate_statement(db, file_hash):
+            try:
+                file_hash, tmp_path = await _spool_upload(file)
+            except HTTPException as e:
+                errors.append({
+                    "filename": file.filename,
+                    "error": e.detail
+                })
+                continue
+            except Exception as e:
                 errors.append({
                     "filename": file.filename,
+                    "error": f"Failed to parse: {str(e)}"
+                })
+                continue
+
+            spooled.append((file.filename, file_hash, tmp_path))
+
+        # Phase 2: check all hashes for duplicates in one query, and drop
+        # repeated uploads of the same file within this batch
+        duplicates = check_duplicate_statements(db, [file_hash for _, file_hash, _ in spooled])
+
+        pending = []
+        batch_files = {}
+        for filename, file_hash, tmp_path in spooled:
+            if file_hash in duplicates:
+                errors.append({
+                    "filename": filename,
                     "error": "This statement has already been imported (duplicate file hash)"
                 })
+            elif file_hash in batch_files:
+                errors.append({
+                    "filename": filename,
+                    "error": f"Same file as {batch_files[file_hash]} in this batch"
+                })
+            else:
+                batch_files[file_hash] = filename
+                pending.append((filename, file_hash, tmp_path))
+
+        # Phase 3: parse the remaining statements concurrently, each in a
+        # worker thread and bounded by the shared parse slots. The 429
+        # deadline applies once, on admission: after that the batch's files
+        # queue for slots without it, so slow early files (OCR) can't make
+        # later files of the same upload time out behind them
+        if pending:
+            async with _parse_slot():
+                pass
+
+        parsed = await asyncio.gather(
+            *(_parse_cached(file_hash, tmp_path, bank_name, use_ocr, queue_timeout=None)
+              for _, file_hash, tmp_path in pending),
+            return_exceptions=True
+        )
+
+        parsed_ok = []
+        for (filename, file_hash, _), result in zip(pending, parsed):
+            if isinstance(result, HTTPException):
+                errors.append({
+                    "filename": filename,
+                    "error": result.detail
+                })
                 continue
+            if isinstance(result, BaseException):
+                errors.append({
+                    "filename": filename,
+                    "error": f"Failed to parse: {str(result)}"
+                })
+                continue
+            content_hash = calculate_content_hash(result['transactions'])
+            parsed_ok.append((filename, file_hash, result, content_hash))
 
-            # Save to temporary file for pdfplumber
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(content)
-                tmp_path = tmp_file.name
+        # Phase 4: check all transaction fingerprints in one query, catching
+        # re-exports of imported statements and of statements in this batch
+        content_duplicates = check_duplicate_contents(
+            db, [content_hash for *_, content_hash in parsed_ok]
+        )
 
-            try:
-                # Parse the statement with OCR support
-                result = parse_bank_statement(tmp_path, bank_name, use_ocr=use_ocr)
+        batch_contents = {}
+        for filename, file_hash, result, content_hash in parsed_ok:
+            if content_hash in content_duplicates:
+                errors.append({
+                    "filename": filename,
+                    "error": "This statement has already been imported (matching transactions)"
+                })
+                continue
+            if content_hash in batch_contents:
+                errors.append({
+                    "filename": filename,
+                    "error": f"Same transactions as {batch_contents[content_hash]} in this batch"
+                })
+                continue
+            if content_hash is not None:
+                batch_contents[content_hash] = filename
 
-                # Calculate total amount
-                total_amount = sum(txn['amount'] for txn in result['transactions'])
+            txns = result['transactions']
 
-                # Build response
-                response = {
-                    "filename": file.filename,
-                    "file_hash": file_hash,
-                    "bank_name": result['bank_name'],
-                    "statement_date": result['statement_date'],
-                    "transaction_count": result['transaction_count'],
-                    "transactions": [Transaction(**txn).model_dump() for txn in result['transactions']],
-                    "total_amount": total_amount,
-                    "ocr_used": result.get('ocr_used', False)
-                }
-
-                results.append(response)
-
-            finally:
-                # Clean up temp file
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-
-        except Exception as e:
-            errors.append({
-                "filename": file.filename,
-                "error": f"Failed to parse: {str(e)}"
+            # Calculate total amount
+            total_amount = math.fsum(txn['amount'] for txn in txns)
+
+            # Build response
+            results.append({
+                "filename": filename,
+                "file_hash": file_hash,
+                "bank_name": result['bank_name'],
+                "statement_date": result['statement_date'],
+                "transaction_count": result['transaction_count'],
+                "transactions": [{**txn, **_PREVIEW_DEFAULTS} for txn in txns],
+                "total_amount": total_amount,
+                "ocr_used": result.get('ocr_used', False)
             })
 
+    finally:
+        # Clean up temp files
+        for _, _, tmp_path in spooled:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
     return {
         "success_count": len(results),
         "error_count": len(errors),
@@ -386,6 +672,23 @@ async def get_transaction_suggestions(
     return SuggestionResponse(**suggestions)
 
 
+@router.post("/suggestions-batch", response_model=List[SuggestionResponse])
+async def get_transaction_suggestions_batch(
+    requests: List[SuggestionRequest],
+    db: Session = Depends(get_db)
+):
+    """
+    Get suggestions for many transactions at once (e.g. a whole statement).
+
+    Learned patterns are loaded once for the batch instead of once per
+    transaction. Suggestions are returned in request order.
+    """
+    service = CategorizationService(db)
+    return service.find_suggestions_batch(
+        [{"description": r.description, "reference": r.reference} for r in requests]
+    )
+
+
 @router.post("/learn-pattern")
 async def learn_from_edit(
     original_description: str,
@@ -409,37 +712,44 @@ async def learn_from_edit(
     return {"message": "Pattern learned successfully"}
 
 
+def _statements_since(query, since: Optional[datetime]):
+    """Restrict a statements query to imports at or after since"""
+    if since is not None:
+        query = query.filter(Statement.imported_at >= since)
+    return query
+
+
 @router.get("/list")
-async def list_saved_statements(db: Session = Depends(get_db)):
+async def list_saved_statements(
+    limit: Annotated[int, Query(ge=1, le=500, description="Statements per page")] = 50,
+    offset: Annotated[int, Query(ge=0, description="Statements to skip")] = 0,
+    since: Annotated[Optional[datetime], Query(description="Only statements imported at or after this time")] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Get all saved statements with their transactions.
+    Get a page of saved statements with their transactions.
 
     Returns statements in reverse chronological order (newest first).
+    Use /count for the total number of statements to paginate over.
     """
-    from ..db.models import Statement, StagingTransaction, Category
-    from sqlalchemy import desc
-
     try:
-        # Get all statements ordered by import date (newest first)
-        statements = db.query(Statement).order_by(desc(Statement.imported_at)).all()
+        # Get one page of statements ordered by import date (newest first),
+        # eager loading transactions (one batched SELECT) with their
+        # categories (JOINed into it) instead of querying per statement
+        query = _statements_since(db.query(Statement), since)
+        statements = query.options(
+            selectinload(Statement.transactions).joinedload(StagingTransaction.category)
+        ).order_by(
+            desc(Statement.imported_at), desc(Statement.id)
+        ).limit(limit).offset(offset).all()
 
         result = []
         for stmt in statements:
-            # Get all transactions for this statement
-            transactions = db.query(StagingTransaction).filter(
-                StagingTransaction.statement_id == stmt.id
-            ).order_by(StagingTransaction.line_number).all()
-
-            # Get category info for each transaction
             trans_list = []
-            for txn in transactions:
-                category_name = None
-                category_icon = None
-                if txn.category_id:
-                    category = db.query(Category).filter(Category.id == txn.category_id).first()
-                    if category:
-                        category_name = category.name
-                        category_icon = category.icon
+            for txn in stmt.transactions:
+                category = txn.category
+                category_name = category.name if category else None
+                category_icon = category.icon if category else None
 
                 trans_list.append({
                     "id": txn.id,
@@ -477,6 +787,23 @@ async def list_saved_statements(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/count")
+async def count_saved_statements(
+    since: Annotated[Optional[datetime], Query(description="Only statements imported at or after this time")] = None,
+    db: Session = Depends(get_db)
+):
+    """Get the number of saved statements, for paginating /list"""
+    try:
+        query = _statements_since(db.query(func.count(Statement.id)), since)
+        return {"count": query.scalar()}
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to count statements: {str(e)}"
+        )
+
+
 @router.put("/transactions/{transaction_id}")
 async def update_transaction(
     transaction_id: int,
@@ -489,54 +816,82 @@ async def update_transaction(
     This allows editing transactions that are already in the database.
     Triggers pattern learning if description is changed.
     """
-    from ..db.models import StagingTransaction
-
     try:
-        # Find the transaction
-        transaction = db.query(StagingTransaction).filter(
-            StagingTransaction.id == transaction_id
-        ).first()
+        by_id = StagingTransaction.id == transaction_id
+        changes = {}
+
+        if update_data.description is not None:
+            # Only a real change stores the first original description and
+            # flags the row as edited (SET expressions see the old row)
+            changed = StagingTransaction.description != update_data.description
+            changes.update(
+                description=update_data.description,
+                original_description=case(
+                    (changed, func.coalesce(StagingTransaction.original_description,
+                                            StagingTransaction.description)),
+                    else_=StagingTransaction.original_description
+                ),
+                is_edited=case((changed, True), else_=StagingTransaction.is_edited)
+            )
 
-        if not transaction:
+        if update_data.category_id is not None:
+            changes['category_id'] = update_data.category_id
+
+        # Pattern learning needs the pre-edit text, so fetch just those columns
+        learn_from = None
+        if update_data.description is not None and update_data.category_id is not None:
+            learn_from = db.execute(
+                select(
+                    StagingTransaction.description,
+                    StagingTransaction.original_description,
+                    StagingTransaction.reference
+                ).where(by_id)
+            ).first()
+            if learn_from is not None and learn_from.description == update_data.description:
+                learn_from = None
+
+        returned = (
+            StagingTransaction.description,
+            StagingTransaction.category_id,
+            StagingTransaction.is_edited
+        )
+        if changes:
+            query = (
+                update(StagingTransaction)
+                .where(by_id)
+                .values(**changes)
+                .returning(*returned)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            query = select(*returned).where(by_id)
+
+        row = db.execute(query).first()
+
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Transaction with id {transaction_id} not found"
             )
 
-        # Store original for pattern learning
-        original_description = transaction.original_description or transaction.description
-
-        # Update fields
-        if update_data.description is not None and update_data.description != transaction.description:
-            # Store original if not already stored
-            if not transaction.original_description:
-                transaction.original_description = transaction.description
-
-            transaction.description = update_data.description
-            transaction.is_edited = True
-
-            # Trigger pattern learning
-            if update_data.category_id is not None:
-                service = CategorizationService(db)
-                service.learn_pattern(
-                    original_description=original_description,
-                    new_description=update_data.description,
-                    reference=transaction.reference or "",
-                    category_id=update_data.category_id
-                )
-
-        if update_data.category_id is not None:
-            transaction.category_id = update_data.category_id
+        # Trigger pattern learning
+        if learn_from is not None:
+            service = CategorizationService(db)
+            service.learn_pattern(
+                original_description=learn_from.original_description or learn_from.description,
+                new_description=update_data.description,
+                reference=learn_from.reference or "",
+                category_id=update_data.category_id
+            )
 
         db.commit()
-        db.refresh(transaction)
 
         return {
             "message": "Transaction updated successfully",
             "transaction_id": transaction_id,
-            "description": transaction.description,
-            "category_id": transaction.category_id,
-            "is_edited": transaction.is_edited
+            "description": row.description,
+            "category_id": row.category_id,
+            "is_edited": row.is_edited
         }
 
     except HTTPException:
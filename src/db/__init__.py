@@ -4,10 +4,14 @@ from .connection import get_db, engine, Base
 from .models import Statement, StagingTransaction
 from .operations import (
     calculate_file_hash,
+    calculate_content_hash,
     get_currency_code,
     create_statement,
     bulk_insert_transactions,
-    check_duplicate_statement
+    check_duplicate_statement,
+    check_duplicate_statements,
+    check_duplicate_content,
+    check_duplicate_contents
 )
 
 __all__ = [
@@ -17,8 +21,12 @@ __all__ = [
     'Statement',
     'StagingTransaction',
     'calculate_file_hash',
+    'calculate_content_hash',
     'get_currency_code',
     'create_statement',
     'bulk_insert_transactions',
-    'check_duplicate_statement'
+    'check_duplicate_statement',
+    'check_duplicate_statements',
+    'check_duplicate_content',
+    'check_duplicate_contents'
 ]
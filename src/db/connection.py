@@ -1,7 +1,7 @@
 """Database connection and session management"""
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -16,7 +16,28 @@ DATABASE_URL = os.getenv(
 # Create engine
 # Add connect_args for SQLite compatibility
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+
+engine_kwargs = {}
+if not DATABASE_URL.startswith("sqlite"):
+    # Size the pool for concurrent uploads/batch parses, and validate pooled
+    # connections so ones closed by the server don't surface as 500s
+    engine_kwargs.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        pool_pre_ping=True,
+        pool_recycle=1800
+    )
+
+if make_url(DATABASE_URL).get_driver_name() == "psycopg2":
+    # Coalesce executemany INSERTs into multi-row VALUES pages and batch
+    # executemany UPDATE/DELETEs, instead of one round-trip per row
+    engine_kwargs.update(
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=1000,
+        executemany_batch_page_size=500
+    )
+
+engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args, **engine_kwargs)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
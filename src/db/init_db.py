@@ -1,7 +1,48 @@
 """Database initialization script"""
 
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.schema import CreateIndex
 from .connection import engine, Base
-from .models import Statement, StagingTransaction
+from .models import Statement, StagingTransaction, TransactionPattern
+
+# Columns added to existing tables since they were first released, by table.
+# They are added without constraints (SQLite can't ADD COLUMN ... UNIQUE);
+# uniqueness comes from the column's unique index, created afterwards
+ADDED_COLUMNS = {
+    'statements': ['content_hash'],
+    'transaction_patterns': ['match_value'],
+}
+
+
+def add_missing_columns():
+    """Add ADDED_COLUMNS that an existing database doesn't have yet"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table_name, column_names in ADDED_COLUMNS.items():
+            existing = {column['name'] for column in inspector.get_columns(table_name)}
+            table = Base.metadata.tables[table_name]
+            for name in column_names:
+                if name not in existing:
+                    column_type = table.c[name].type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+                    print(f"  + added column {table_name}.{name}")
+
+
+def backfill_match_values():
+    """Fill in TransactionPattern.match_value for patterns stored without one"""
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(TransactionPattern.id, TransactionPattern.pattern_value)
+            .where(TransactionPattern.match_value.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(TransactionPattern)
+                .where(TransactionPattern.id == bindparam('pattern_id'))
+                .values(match_value=bindparam('lowered')),
+                [{'pattern_id': row.id, 'lowered': row.pattern_value.lower()} for row in rows]
+            )
+            print(f"  + lowercased {len(rows)} pattern values")
 
 
 def init_database():
@@ -9,10 +50,23 @@ def init_database():
     Initialize database by creating all tables.
 
     This uses SQLAlchemy's create_all() which is safe to run multiple times
-    (it only creates tables that don't exist).
+    (it only creates tables that don't exist). Columns and indexes added to
+    existing tables since they were created are created as well.
     """
     print("Initializing database...")
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    backfill_match_values()
+    # IF NOT EXISTS rather than checkfirst: reflection doesn't report
+    # expression indexes on every backend, so checkfirst can't be relied on.
+    # Runs after add_missing_columns, which the indexed columns may need
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+        # Superseded by ix_staging_txn_stmt_line, whose leading column
+        # serves the same statement_id lookups
+        conn.execute(text("DROP INDEX IF EXISTS ix_staging_transactions_statement_id"))
     print("✓ Database tables created successfully")
     print("  - statements")
     print("  - staging_transactions")
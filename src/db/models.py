@@ -1,6 +1,7 @@
 """SQLAlchemy ORM models for database tables"""
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .connection import Base
 
@@ -14,16 +15,28 @@ class Statement(Base):
     bank_name = Column(String(255), nullable=False)
     statement_date = Column(String(50))
     file_hash = Column(String(64), unique=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True)  # Fingerprint of parsed transactions
     transaction_count = Column(Integer, default=0)
-    imported_at = Column(DateTime(timezone=True), server_default=func.now())
+    imported_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    transactions = relationship(
+        "StagingTransaction",
+        backref="statement",
+        order_by="StagingTransaction.line_number"
+    )
 
 
 class StagingTransaction(Base):
     """Staging transactions table - holds parsed transactions for review"""
     __tablename__ = 'staging_transactions'
+    __table_args__ = (
+        # Serves "transactions of a statement in line order" as an ordered
+        # index scan, without a separate sort step
+        Index('ix_staging_txn_stmt_line', 'statement_id', 'line_number'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    statement_id = Column(Integer, ForeignKey('statements.id'), nullable=False, index=True)
+    statement_id = Column(Integer, ForeignKey('statements.id'), nullable=False)
     tax_entity_id = Column(Integer, nullable=False, index=True)
     date = Column(String(50), nullable=False)  # Kept for backward compatibility
     description = Column(Text, nullable=False)
@@ -45,6 +58,8 @@ class StagingTransaction(Base):
     category_id = Column(Integer, ForeignKey('categories.id'), index=True)
     is_edited = Column(Boolean, default=False)
 
+    category = relationship("Category")
+
 
 class Category(Base):
     """Transaction categories for classification"""
@@ -58,15 +73,27 @@ class Category(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+def _lowercase_pattern_value(context):
+    """Default for TransactionPattern.match_value: pattern_value, lowercased"""
+    return context.get_current_parameters()['pattern_value'].lower()
+
+
 class TransactionPattern(Base):
     """Learned patterns for auto-categorization and description enhancement"""
     __tablename__ = 'transaction_patterns'
+    __table_args__ = (
+        # One pattern per type and value; learn_pattern upserts against it
+        Index('ux_transaction_patterns_type_value', 'pattern_type', 'pattern_value', unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     # Pattern matching
     pattern_type = Column(String(50), nullable=False)  # 'contains', 'starts_with', 'regex', etc.
     pattern_value = Column(String(255), nullable=False, index=True)  # The text/regex to match
+    # pattern_value lowercased by Python, so SQL matching agrees with str.lower()
+    # on non-ASCII letters (SQL lower() may only fold ASCII)
+    match_value = Column(String(255), default=_lowercase_pattern_value)
 
     # Actions to take when pattern matches
     category_id = Column(Integer, ForeignKey('categories.id'))
@@ -1,7 +1,12 @@
 """Database operations for statements and transactions"""
 
 import hashlib
-from typing import List, Optional
+import io
+import time
+from operator import itemgetter
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import insert, literal, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
 from .models import Statement, StagingTransaction
 
@@ -11,31 +16,77 @@ def calculate_file_hash(file_content: bytes) -> str:
     return hashlib.sha256(file_content).hexdigest()
 
 
-def get_currency_code(db: Session, tax_entity_id: int) -> Optional[str]:
+def calculate_content_hash(transactions: List[dict]) -> Optional[str]:
     """
-    Infer currency code from tax_entities table based on country.
-    Returns None if not found or table doesn't exist yet.
+    Fingerprint a statement by its parsed transactions instead of its bytes.
+
+    Re-exports of the same statement (re-printed from internet banking,
+    re-saved with new metadata) have different file hashes but the same
+    (date, amount, balance) rows, so they share a content hash.
+    Returns None for statements without transactions.
     """
+    if not transactions:
+        return None
+
+    digest = hashlib.blake2b(digest_size=32)
+    for txn in sorted(transactions, key=itemgetter('line_number')):
+        balance = txn.get('balance')
+        balance_str = '' if balance is None else f"{balance:.2f}"
+        digest.update(f"{txn['date']}:{txn['amount']:.2f}:{balance_str}|".encode())
+
+    return digest.hexdigest()
+
+
+# A tax entity's currency effectively never changes, so lookups are cached
+# in-process for this many seconds
+CURRENCY_CACHE_TTL = 60.0
+
+# tax_entity_id -> (fetched_at, currency_code)
+_currency_cache: Dict[int, Tuple[float, Optional[str]]] = {}
+
+
+# Built once at import rather than per lookup
+_CURRENCY_SQL = text("SELECT currency_code FROM tax_entities WHERE id = :id")
+
+
+def _query_currency(db: Session, tax_entity_id: int) -> Optional[str]:
+    """Look up currency code for a tax entity directly in the database"""
     try:
         # This assumes tax_entities table exists with currency_code column
         # If not, this will be handled gracefully
-        result = db.execute(
-            "SELECT currency_code FROM tax_entities WHERE id = :id",
-            {"id": tax_entity_id}
-        ).fetchone()
-        return result[0] if result else None
-    except Exception:
-        # Table might not exist yet - return None
+        return db.execute(_CURRENCY_SQL, {"id": tax_entity_id}).scalar_one_or_none()
+    except (ProgrammingError, OperationalError):
+        # Table might not exist yet - return None. On PostgreSQL the failed
+        # statement aborts the transaction, so roll back to keep the session usable
+        db.rollback()
         return None
 
 
+def get_currency_code(db: Session, tax_entity_id: int) -> Optional[str]:
+    """
+    Infer currency code from tax_entities table based on country.
+    Returns None if not found or table doesn't exist yet.
+
+    Results are cached per tax entity for CURRENCY_CACHE_TTL seconds.
+    """
+    now = time.monotonic()
+    cached = _currency_cache.get(tax_entity_id)
+    if cached is not None and now - cached[0] < CURRENCY_CACHE_TTL:
+        return cached[1]
+
+    currency_code = _query_currency(db, tax_entity_id)
+    _currency_cache[tax_entity_id] = (now, currency_code)
+    return currency_code
+
+
 def create_statement(
     db: Session,
     tax_entity_id: int,
     bank_name: str,
     statement_date: Optional[str],
     file_hash: str,
-    transaction_count: int
+    transaction_count: int,
+    content_hash: Optional[str] = None
 ) -> Statement:
     """Create new statement record"""
     statement = Statement(
@@ -43,6 +94,7 @@ def create_statement(
         bank_name=bank_name,
         statement_date=statement_date,
         file_hash=file_hash,
+        content_hash=content_hash,
         transaction_count=transaction_count
     )
     db.add(statement)
@@ -50,6 +102,56 @@ def create_statement(
     db.refresh(statement)
     return statement
 
+# Built once and reused for every executemany; its compiled form is then
+# served from SQLAlchemy's statement cache
+_INSERT_STAGING = insert(StagingTransaction)
+
+# Statements with more rows than this are loaded with COPY on PostgreSQL
+COPY_THRESHOLD = 1000
+
+# Columns written by COPY, in row order. is_edited is listed explicitly
+# because COPY bypasses the ORM's Python-side column defaults
+_COPY_COLUMNS = (
+    'statement_id', 'tax_entity_id', 'date', 'description', 'amount',
+    'currency_code', 'status', 'line_number', 'post_date', 'trans_date',
+    'reference', 'fees', 'balance', 'is_edited'
+)
+
+_COPY_SQL = (
+    f"COPY {StagingTransaction.__tablename__} ({', '.join(_COPY_COLUMNS)}) FROM STDIN"
+)
+
+# Escapes for COPY's text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_value(value) -> str:
+    """Encode one field in PostgreSQL COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    return str(value)
+
+
+def _copy_transactions(db: Session, rows: List[dict]):
+    """
+    Stream rows into staging_transactions with COPY FROM STDIN.
+
+    Runs on the session's own connection, so the load is part of the
+    session transaction and is committed by the caller.
+    """
+    buf = io.StringIO()
+    for row in rows:
+        row['is_edited'] = False
+        buf.write('\t'.join([_copy_value(row[column]) for column in _COPY_COLUMNS]))
+        buf.write('\n')
+    buf.seek(0)
+
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(_COPY_SQL, buf)
+
 
 def bulk_insert_transactions(
     db: Session,
@@ -64,35 +166,78 @@ def bulk_insert_transactions(
 
     Supports both legacy (date, description, amount) and extended
     (post_date, trans_date, reference, fees, balance) formats.
+
+    Rows are sent as plain dicts in a single executemany INSERT, which
+    SQLAlchemy batches into multi-row VALUES statements (execute_values on
+    psycopg2) instead of building one ORM object per transaction. Large
+    statements on PostgreSQL are streamed with COPY instead.
     """
-    staging_transactions = []
-
-    for txn in transactions:
-        staging_txn = StagingTransaction(
-            statement_id=statement_id,
-            tax_entity_id=tax_entity_id,
-            date=txn['date'],
-            description=txn['description'],
-            amount=txn['amount'],
-            currency_code=currency_code,
-            status='pending_review',
-            line_number=txn.get('line_number'),
+    rows = [
+        {
+            'statement_id': statement_id,
+            'tax_entity_id': tax_entity_id,
+            'date': txn['date'],
+            'description': txn['description'],
+            'amount': txn['amount'],
+            'currency_code': currency_code,
+            'status': 'pending_review',
+            'line_number': txn.get('line_number'),
             # Extended fields (optional)
-            post_date=txn.get('post_date'),
-            trans_date=txn.get('trans_date'),
-            reference=txn.get('reference'),
-            fees=txn.get('fees'),
-            balance=txn.get('balance')
-        )
-        staging_transactions.append(staging_txn)
-
-    db.bulk_save_objects(staging_transactions)
+            'post_date': txn.get('post_date'),
+            'trans_date': txn.get('trans_date'),
+            'reference': txn.get('reference'),
+            'fees': txn.get('fees'),
+            'balance': txn.get('balance')
+        }
+        for txn in transactions
+    ]
+
+    if len(rows) > COPY_THRESHOLD and db.get_bind().dialect.driver == "psycopg2":
+        _copy_transactions(db, rows)
+    elif rows:
+        db.execute(_INSERT_STAGING, rows)
     db.commit()
 
-    return len(staging_transactions)
+    return len(rows)
 
 
 def check_duplicate_statement(db: Session, file_hash: str) -> bool:
     """Check if statement with this file hash already exists"""
-    existing = db.query(Statement).filter(Statement.file_hash == file_hash).first()
-    return existing is not None
+    # SELECT 1 ... LIMIT 1 is answered from the unique file_hash index
+    # without loading a Statement row
+    query = select(literal(1)).where(Statement.file_hash == file_hash).limit(1)
+    return db.execute(query).first() is not None
+
+
+def check_duplicate_statements(db: Session, file_hashes: List[str]) -> Set[str]:
+    """
+    Check many file hashes at once.
+    Returns the subset of hashes that already exist, using a single query.
+    """
+    if not file_hashes:
+        return set()
+
+    query = select(Statement.file_hash).where(Statement.file_hash.in_(set(file_hashes)))
+    return set(db.execute(query).scalars())
+
+
+def check_duplicate_content(db: Session, content_hash: Optional[str]) -> bool:
+    """Check if a statement with the same parsed transactions already exists"""
+    if content_hash is None:
+        return False
+
+    query = select(literal(1)).where(Statement.content_hash == content_hash).limit(1)
+    return db.execute(query).first() is not None
+
+
+def check_duplicate_contents(db: Session, content_hashes: List[Optional[str]]) -> Set[str]:
+    """
+    Check many content hashes at once.
+    Returns the subset of hashes that already exist, using a single query.
+    """
+    content_hashes = {content_hash for content_hash in content_hashes if content_hash is not None}
+    if not content_hashes:
+        return set()
+
+    query = select(Statement.content_hash).where(Statement.content_hash.in_(content_hashes))
+    return set(db.execute(query).scalars())
@@ -4,16 +4,30 @@ FastAPI application for PDF Bank Statement Parser
 Main application entry point that configures FastAPI and includes routes.
 """
 
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from .api import router
+from .db import engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: release pooled DB connections on shutdown"""
+    yield
+    engine.dispose()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Bank Statement Parser API",
     description="Parse PDF bank statements and extract transactions for Lederly",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson serializes large transaction lists several times faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend integration
@@ -39,27 +53,36 @@ async def root():
     }
 
 
+@lru_cache(maxsize=None)
+def _load_page(path: str) -> str:
+    """Read a static HTML page once; restart the server to pick up edits"""
+    with open(path, "r") as f:
+        return f.read()
+
+
 @app.get("/upload", response_class=HTMLResponse)
 async def upload_page():
     """Serve the multi-statement upload page"""
-    with open("/tmp/multi_statement_review.html", "r") as f:
-        return f.read()
+    return _load_page("/tmp/multi_statement_review.html")
 
 
 @app.get("/debug", response_class=HTMLResponse)
 async def debug_page():
     """Serve the debug parser page"""
-    with open("/tmp/debug_parser.html", "r") as f:
-        return f.read()
+    return _load_page("/tmp/debug_parser.html")
 
 
 @app.get("/statements", response_class=HTMLResponse)
 async def view_statements_page():
     """Serve the view saved statements page"""
-    with open("/tmp/view_statements.html", "r") as f:
-        return f.read()
+    return _load_page("/tmp/view_statements.html")
 
 
 if __name__ == "__main__":
     import uvicorn
+    import warnings
+    warnings.warn(
+        "Development server (single process); run `gunicorn src.main:app` in production",
+        stacklevel=1
+    )
     uvicorn.run(app, host="0.0.0.0", port=8000)
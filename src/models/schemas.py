@@ -72,6 +72,7 @@ class ParseResponse(BaseModel):
     transactions: List[Transaction]
     total_amount: float = Field(description="Sum of all transaction amounts")
     ocr_used: bool = Field(default=False, description="Whether OCR was used for text extraction")
+    file_hash: str = Field(description="SHA-256 of the uploaded PDF, sent back in the confirm request")
 
 
 class ConfirmRequest(BaseModel):
@@ -79,6 +80,7 @@ class ConfirmRequest(BaseModel):
     bank_name: str
     statement_date: Optional[str]
     tax_entity_id: int
+    file_hash: str = Field(description="file_hash from the /parse response")
     transactions: List[Transaction]
 
 
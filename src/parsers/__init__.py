@@ -1,8 +1,13 @@
 """PDF Bank Statement Parser Module"""
 
+import asyncio
 from .table_parser_v3 import TableParserV3
 from typing import Dict
 
+# The parser holds only read-only configuration after construction, so one
+# instance is shared by every parse (including concurrent worker threads)
+shared_parser = TableParserV3()
+
 def parse_bank_statement(pdf_path: str, bank_name: str, use_ocr: bool = False) -> Dict:
     """
     Parse bank statement from PDF using OCR-enabled table parser.
@@ -10,18 +15,16 @@ def parse_bank_statement(pdf_path: str, bank_name: str, use_ocr: bool = False) -
     Args:
         pdf_path: Path to PDF file
         bank_name: Bank name (manually provided by user)
-        use_ocr: Force OCR mode (auto-detects garbled text by default)
+        use_ocr: Force OCR mode (auto-detects scanned/garbled PDFs by default)
 
     Returns:
         Dict with metadata and transactions
     """
-    parser = TableParserV3()
-    transactions, ocr_used = parser.parse_bank_statement(pdf_path)
+    transactions, ocr_used = shared_parser.parse_bank_statement(pdf_path, force_ocr=use_ocr)
 
-    # Convert BankTransaction objects to dicts
-    transaction_dicts = []
-    for txn in transactions:
-        transaction_dicts.append({
+    # Convert BankTransaction objects to dicts (in Transaction schema order)
+    transaction_dicts = [
+        {
             'date': txn.trans_date,
             'description': txn.description,
             'amount': txn.amount,
@@ -31,7 +34,9 @@ def parse_bank_statement(pdf_path: str, bank_name: str, use_ocr: bool = False) -
             'reference': txn.reference,
             'fees': txn.fees,
             'balance': txn.balance
-        })
+        }
+        for txn in transactions
+    ]
 
     # Extract statement date from first transaction
     statement_date = transactions[0].post_date if transactions else None
@@ -44,4 +49,14 @@ def parse_bank_statement(pdf_path: str, bank_name: str, use_ocr: bool = False) -
         'ocr_used': ocr_used
     }
 
-__all__ = ['TableParserV3', 'parse_bank_statement']
+
+async def parse_bank_statement_async(pdf_path: str, bank_name: str, use_ocr: bool = False) -> Dict:
+    """
+    Parse bank statement in a worker thread, for use from async code.
+
+    Text extraction and OCR block, so running them on the event loop would
+    stall every other request. Same arguments and result as parse_bank_statement.
+    """
+    return await asyncio.to_thread(parse_bank_statement, pdf_path, bank_name, use_ocr=use_ocr)
+
+__all__ = ['TableParserV3', 'shared_parser', 'parse_bank_statement', 'parse_bank_statement_async']
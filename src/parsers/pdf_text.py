@@ -0,0 +1,91 @@
+"""
+PDF text-layer extraction backed by PyMuPDF
+
+PyMuPDF hands extraction to MuPDF's C parser instead of lexing every
+content-stream operator in Python like pdfplumber/pdfminer does, which makes
+word extraction several times faster. pdfplumber is still used for table
+extraction in the debug endpoint, and as a fallback for files MuPDF refuses
+to open.
+"""
+
+from typing import List, Optional
+import pdfplumber
+import pymupdf
+
+
+# Words whose vertical centres are within this fraction of the word height
+# of a row's first word belong to that row
+ROW_TOLERANCE = 0.5
+
+
+def extract_pages_rows(pdf_path: str, max_pages: Optional[int] = None) -> List[str]:
+    """
+    Extract the text layer of each page with words regrouped into visual rows.
+
+    Statement tables are often drawn cell by cell, so plain extraction puts
+    each column on its own line. Grouping words by vertical position gives
+    one line per table row, left to right - the same shape OCR produces.
+
+    Args:
+        pdf_path: Path to PDF file
+        max_pages: Only read the first N pages (default: all pages)
+
+    Returns:
+        List with one text string per page, one row per line
+    """
+    try:
+        doc = pymupdf.open(pdf_path)
+    except pymupdf.FileDataError:
+        # pdfplumber already lays out text by rows
+        return _extract_pages_text_pdfplumber(pdf_path, max_pages)
+
+    with doc:
+        page_count = doc.page_count
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+
+        return [_rows_text(doc.load_page(i).get_text("words")) for i in range(page_count)]
+
+
+def _rows_text(words: List[tuple]) -> str:
+    """Join PyMuPDF word tuples (x0, y0, x1, y1, word, ...) into row lines"""
+    rows = []  # [row centre, [(x0, word), ...]]
+    for x0, y0, x1, y1, word, *_ in sorted(words, key=lambda w: w[1] + w[3]):
+        centre = (y0 + y1) / 2
+        if rows and centre - rows[-1][0] <= (y1 - y0) * ROW_TOLERANCE:
+            rows[-1][1].append((x0, word))
+        else:
+            rows.append([centre, [(x0, word)]])
+
+    return '\n'.join(' '.join(word for _, word in sorted(row_words)) for _, row_words in rows)
+
+
+def _extract_pages_text_pdfplumber(pdf_path: str, max_pages: Optional[int]) -> List[str]:
+    """Slow-path text extraction with pdfplumber, for files MuPDF rejects"""
+    pages = list(range(1, max_pages + 1)) if max_pages is not None else None
+    with pdfplumber.open(pdf_path, pages=pages) as pdf:
+        pages_text = []
+        for page in pdf.pages:
+            pages_text.append(page.extract_text() or "")
+            # Release the page's cached layout objects before the next one
+            page.close()
+        return pages_text
+
+
+# Fewer extractable characters than this across the sampled pages means the
+# PDF is a scanned image without a usable (born-digital) text layer
+MIN_TEXT_LAYER_CHARS = 200
+
+
+def has_text_layer(pages_text: List[str], min_chars: int = MIN_TEXT_LAYER_CHARS) -> bool:
+    """
+    Check whether extracted page text looks like a born-digital text layer.
+
+    Args:
+        pages_text: Text of the sampled pages (see extract_pages_rows)
+        min_chars: Minimum number of extracted characters, ignoring page padding
+
+    Returns:
+        True if text extraction is usable, False if the pages need OCR
+    """
+    return sum(len(text.strip()) for text in pages_text) >= min_chars
@@ -5,15 +5,100 @@ Based on actual OCR output analysis, Capitec statements have all data on single
 Format: PostDate TransDate Description Reference Fees Amount Balance
 """
 
+import errno
+import os
 import re
-from typing import List, Dict, Optional, Tuple
+import sys
+import tempfile
+import threading
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
-import pdfplumber
+import pymupdf
 import pytesseract
-from pdf2image import convert_from_path
-
-
-@dataclass
+from dotenv import load_dotenv
+
+from .pdf_text import extract_pages_rows, has_text_layer
+
+# The OCR settings below are read at import, which can come before anything
+# else has loaded .env (the API imports the parsers before the database)
+load_dotenv()
+
+# Several statements may be OCR'd at once; keep each Tesseract process
+# single-threaded so concurrent runs don't oversubscribe the CPU with OpenMP
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# Optional: tesserocr drives libtesseract in-process, avoiding a fork/exec
+# and a model load per page. pytesseract (the tesseract CLI) is the fallback.
+# Imported after OMP_THREAD_LIMIT is set so its OpenMP runtime honours it
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Rendered page images are written here (RAM-backed tmpfs by default) for
+# Tesseract to read; falls back to the default temp dir if it doesn't exist
+OCR_SCRATCH_DIR = os.getenv("OCR_SCRATCH_DIR", "/dev/shm")
+
+# Pages are OCR'd in parallel by a process-wide pool, which also caps the
+# number of Tesseract instances across concurrent parses. Tesseract runs as a
+# subprocess (or releases the GIL under tesserocr), so threads are enough to
+# use every core
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+_ocr_executor = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+# Default render resolution for OCR. Tesseract's accuracy on printed
+# statement fonts plateaus around 200-240 DPI; the resolution is also passed
+# to Tesseract since PNM images carry none of their own
+OCR_DPI = 220
+
+# Characters that occur on statements. Restricting Tesseract to them, with the
+# LSTM engine only (no legacy engine to initialise), narrows its search
+OCR_CHAR_WHITELIST = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789/.,+-*&():#@%"
+)
+
+# Thousands separator inside an amount: a comma or any whitespace. Every
+# character it matches is deleted before float(); Unicode has no whitespace
+# above U+3000 (ideographic space), so that range covers them all
+_AMOUNT_SEPARATOR = r'[\s,]'
+_AMOUNT_SEPARATOR_CHARS = ''.join(
+    char for char in map(chr, range(0x3001)) if re.fullmatch(_AMOUNT_SEPARATOR, char)
+)
+
+def _write_file(path: str, data: bytes) -> str:
+    """Write data to a new file at path, removing it if the write fails"""
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+    except OSError:
+        if os.path.exists(path):
+            os.unlink(path)
+        raise
+    return path
+
+
+# One tesserocr API per OCR thread; PyTessBaseAPI is not thread-safe
+_tesserocr_local = threading.local()
+
+
+def _tesserocr_api() -> "tesserocr.PyTessBaseAPI":
+    """Get this thread's tesserocr API, creating it on first use"""
+    api = getattr(_tesserocr_local, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(
+            lang='eng',
+            psm=tesserocr.PSM.SINGLE_BLOCK,
+            oem=tesserocr.OEM.LSTM_ONLY
+        )
+        api.SetVariable("tessedit_char_whitelist", OCR_CHAR_WHITELIST)
+        _tesserocr_local.api = api
+    return api
+
+
+@dataclass(slots=True, frozen=True)
 class BankTransaction:
     """Represents a single bank transaction"""
     post_date: str
@@ -46,95 +131,232 @@ class TableParserV3:
     DD/MM/YY DD/MM/YY Description Reference -Fees -Amount +Balance
     """
 
-    # Date pattern
-    DATE_PATTERN = re.compile(r'\b(\d{2}/\d{2}/\d{2})\b')
+    # Transaction line: post date and transaction date up front, then the
+    # rest of the line (description, reference and amounts)
+    TXN_LINE_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{2})\s+(\d{2}/\d{2}/\d{2})\b(.*)')
 
     # Amount pattern (handles -7.50 and -10 000.00, and +124 345.00)
     # Need to handle both commas and spaces in thousands
     # Also need to match standalone decimals like .00
-    AMOUNT_PATTERN = re.compile(r'[+-]?\d{1,3}(?:[\s,]\d{3})*\.\d{2}|[+-]\d+\.\d{2}')
+    AMOUNT_PATTERN = re.compile(
+        r'[+-]?\d{1,3}(?:' + _AMOUNT_SEPARATOR + r'\d{3})*\.\d{2}|[+-]\d+\.\d{2}'
+    )
+    # Every separator AMOUNT_PATTERN allows, deleted before float()
+    AMOUNT_SEPARATORS = str.maketrans('', '', _AMOUNT_SEPARATOR_CHARS)
+
+    # Lowercase phrases marking statement header/summary rows, not transactions
+    HEADER_PHRASES = ('balance brought forward', 'interest rate')
 
-    def __init__(self, tesseract_cmd: Optional[str] = None):
+    # Substrings that show up when a font's glyph mapping is broken
+    GARBLED_INDICATORS = ('???', 'ï¿½', '¶', '†', 'ƒ', '⁄', '…', '§', '•')
+    # Garbled extraction is garbled from the first line; judge on a prefix
+    GARBLED_SAMPLE_CHARS = 500
+
+    def __init__(self, tesseract_cmd: Optional[str] = None, dpi: int = OCR_DPI, grayscale: bool = True):
+        """
+        Args:
+            tesseract_cmd: Path to the tesseract binary (default: from PATH)
+            dpi: Resolution pages are rendered at for OCR
+            grayscale: Render single-channel images (Tesseract binarizes
+                anyway); set False to OCR full-colour renders
+        """
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
-    def parse_bank_statement(self, pdf_path: str) -> Tuple[List[BankTransaction], bool]:
-        """Parse bank statement from PDF"""
-        # Check if garbled
-        with pdfplumber.open(pdf_path) as pdf:
-            sample_text = pdf.pages[0].extract_text() or "" if pdf.pages else ""
-            is_garbled = self._is_text_garbled(sample_text)
+        self.dpi = dpi
+        self.colorspace = pymupdf.csGRAY if grayscale else pymupdf.csRGB
+        self.ocr_config = f"--oem 1 --psm 6 --dpi {dpi} -c tessedit_char_whitelist={OCR_CHAR_WHITELIST}"
+
+        # An explicit tesseract binary means the CLI is wanted
+        self.use_tesserocr = tesserocr is not None and not tesseract_cmd
+
+    def parse_bank_statement(self, pdf_path: str, force_ocr: bool = False) -> Tuple[List[BankTransaction], bool]:
+        """
+        Parse bank statement from PDF.
+
+        OCR only runs when it is needed: when forced, when the PDF has no
+        usable text layer (scanned statement) or when that text is garbled.
+        """
+        pages = self._text_layer_pages(pdf_path, force_ocr)
+        if pages is None:
+            return self._parse_pages(self._ocr_pages(pdf_path)), True
+
+        # Born-digital statement: parse the text layer, regrouped into rows
+        return self._parse_pages(pages), False
 
-        if not is_garbled:
-            # Use standard extraction (not implemented for now)
-            return [], False
+    def extract_text_lines(self, pdf_path: str, force_ocr: bool = False) -> List[str]:
+        """
+        Extract the non-empty text lines the parser sees, for debugging.
 
-        print("⚠️  Garbled text detected, using OCR for extraction...")
+        Uses the same text layer / OCR decision as parse_bank_statement.
+        """
+        pages = self._text_layer_pages(pdf_path, force_ocr)
+        if pages is None:
+            pages = self._ocr_pages(pdf_path)
 
-        # Convert PDF to images and OCR
-        images = convert_from_path(pdf_path, dpi=300)
+        return [line.strip() for text in pages for line in text.split('\n') if line.strip()]
 
+    def _parse_pages(self, pages: Iterable[str]) -> List[BankTransaction]:
+        """Parse transactions from the text of each page, numbering them across pages"""
         all_transactions = []
         line_number = 0
 
-        for page_num, image in enumerate(images, 1):
-            # Get OCR text
-            ocr_text = pytesseract.image_to_string(
-                image,
-                lang='eng',
-                config='--oem 3 --psm 6'
-            )
-
+        for page_text in pages:
             # Parse transactions from this page
-            page_transactions = self._parse_page(ocr_text, line_number)
+            page_transactions = self._parse_page(page_text, line_number)
             all_transactions.extend(page_transactions)
             line_number += len(page_transactions)
 
-        return all_transactions, True
+        return all_transactions
+
+    def _text_layer_pages(self, pdf_path: str, force_ocr: bool) -> Optional[List[str]]:
+        """
+        Extract the text layer once, returning None if the PDF needs OCR.
+
+        The decision is made from the first two pages of the same extraction
+        that gets parsed, so the PDF is only opened and decoded once.
+        """
+        if force_ocr:
+            return None
+
+        pages = extract_pages_rows(pdf_path)
+        if has_text_layer(pages[:2]) and not self._is_text_garbled(pages[0]):
+            return pages
+
+        print("⚠️  Garbled or missing text layer detected, using OCR for extraction...")
+        return None
+
+    def _ocr_pages(self, pdf_path: str) -> Iterator[str]:
+        """Yield the OCR text of each page, in page order"""
+        scratch_dir = OCR_SCRATCH_DIR if os.path.isdir(OCR_SCRATCH_DIR) else None
+
+        with ExitStack() as scratch:
+            output_folder = scratch.enter_context(tempfile.TemporaryDirectory(dir=scratch_dir))
+
+            def spill_folder() -> str:
+                # Also removed when OCR is done, after outstanding pages
+                return scratch.enter_context(tempfile.TemporaryDirectory())
+
+            # Pages are rendered in order on this thread (a MuPDF document
+            # isn't thread-safe) and OCR'd concurrently on the shared pool.
+            # At most OCR_WORKERS pages are in flight: the next page is only
+            # rendered once the oldest one has been yielded, so memory and
+            # scratch space stay bounded however long the statement is
+            in_flight = deque()
+            pages = self._render_pages(
+                pdf_path, output_folder, spill_folder if scratch_dir else None
+            )
+            try:
+                for image_path in pages:
+                    in_flight.append(_ocr_executor.submit(self._ocr_image, image_path))
+                    if len(in_flight) >= OCR_WORKERS:
+                        yield in_flight.popleft().result()
+
+                while in_flight:
+                    yield in_flight.popleft().result()
+            finally:
+                # Stop outstanding pages before the scratch dir is removed
+                for future in in_flight:
+                    future.cancel()
+                wait(in_flight)
+                pages.close()
+
+    def _ocr_image(self, image_path: str) -> str:
+        """OCR one rendered page by path (Tesseract reads it directly), then delete it"""
+        try:
+            if self.use_tesserocr:
+                api = _tesserocr_api()
+                api.SetImageFile(image_path)
+                api.SetSourceResolution(self.dpi)
+                return api.GetUTF8Text()
+
+            return pytesseract.image_to_string(
+                image_path,
+                lang='eng',
+                config=self.ocr_config
+            )
+        finally:
+            os.unlink(image_path)
+
+    def _render_pages(self, pdf_path: str, output_folder: str,
+                      spill_folder: Optional[Callable[[], str]] = None) -> Iterator[str]:
+        """
+        Render each page in-process with MuPDF, yielding the image path.
+
+        If writing to output_folder runs out of space (a small tmpfs), this
+        and the remaining pages go to the folder spill_folder() returns.
+        """
+        with pymupdf.open(pdf_path) as doc:
+            for page_num, page in enumerate(doc, 1):
+                # Uncompressed PNM: no encode cost, read natively by Tesseract.
+                # The raw pixel buffer is dropped right away rather than held
+                # while the generator is suspended waiting for OCR to catch up
+                pixmap = page.get_pixmap(dpi=self.dpi, colorspace=self.colorspace, alpha=False)
+                image = pixmap.tobytes("pnm")
+                del pixmap
+
+                image_name = f"page-{page_num}.pnm"
+                try:
+                    image_path = _write_file(os.path.join(output_folder, image_name), image)
+                except OSError as e:
+                    if e.errno != errno.ENOSPC or spill_folder is None:
+                        raise
+                    output_folder, spill_folder = spill_folder(), None
+                    image_path = _write_file(os.path.join(output_folder, image_name), image)
+                del image
+                yield image_path
 
     def _parse_page(self, text: str, start_line: int) -> List[BankTransaction]:
-        """Parse transactions from OCR text of one page"""
+        """Parse transactions from the OCR or text-layer text of one page"""
         transactions = []
-        lines = text.split('\n')
+        # Strip and drop blank lines inline; splitlines also handles \r\n
+        lines = filter(None, map(str.strip, text.splitlines()))
+
+        # Bind per-line lookups to locals once for the scan loop
+        match_txn_line = self.TXN_LINE_PATTERN.match
+        parse_line = self._parse_transaction_line
+        append = transactions.append
+        intern = sys.intern
 
         for line in lines:
-            line = line.strip()
-            if not line:
+            # Only lines starting with two dates can be transactions; one
+            # anchored match rejects headers and footers
+            match = match_txn_line(line)
+            if match is None:
                 continue
 
-            # Look for lines starting with two dates
-            dates = self.DATE_PATTERN.findall(line)
-
-            if len(dates) >= 2:
-                # This is likely a transaction line
-                transaction = self._parse_transaction_line(line, dates, len(transactions) + start_line + 1)
-                if transaction:
-                    transactions.append(transaction)
+            post_date, trans_date, body = match.groups()
+            # Many rows share a date; interned, they share one string object
+            post_date, trans_date = intern(post_date), intern(trans_date)
+            transaction = parse_line(post_date, trans_date, body, len(transactions) + start_line + 1)
+            if transaction:
+                append(transaction)
 
         return transactions
 
-    def _parse_transaction_line(self, line: str, dates: List[str], line_number: int) -> Optional[BankTransaction]:
+    def _parse_transaction_line(self, post_date: str, trans_date: str, body: str,
+                                line_number: int) -> Optional[BankTransaction]:
         """
-        Parse a single transaction line.
+        Parse a single transaction line, given its two leading dates and the
+        rest of the line.
 
         Expected format:
         07/06/23 07/06/23 ******006073** ** Directors Fees Artiligence -7.50 -10000.00, +114 337.50
         """
         try:
-            post_date = dates[0]
-            trans_date = dates[1]
-
-            # Find all amounts in the line
-            amounts = self.AMOUNT_PATTERN.findall(line)
+            # Find all amounts in the line, keeping their positions
+            amount_matches = list(self.AMOUNT_PATTERN.finditer(body))
+            amounts = [match.group() for match in amount_matches]
 
             # Should have 3 amounts: fees, amount, balance
             if len(amounts) < 2:
                 return None  # Need at least amount and balance
 
             # Parse amounts (remove spaces and commas)
+            separators = self.AMOUNT_SEPARATORS
             parsed_amounts = []
             for amt_str in amounts:
-                amt_clean = amt_str.replace(' ', '').replace(',', '')
+                amt_clean = amt_str.translate(separators)
                 try:
                     parsed_amounts.append(float(amt_clean))
                 except ValueError:
@@ -153,18 +375,15 @@ class TableParserV3:
             fees = parsed_amounts[-3] if len(parsed_amounts) >= 3 else None
 
             # Extract description and reference
-            # Remove dates from start
-            remainder = line
-            for date in dates[:2]:
-                remainder = remainder.replace(date, '', 1)
-
-            # Remove the last 3 amounts from end (fees, amount, balance)
-            # Work backwards to avoid partial matches
-            for amt in amounts[-3:]:
-                # Find last occurrence
-                idx = remainder.rfind(amt)
-                if idx != -1:
-                    remainder = remainder[:idx] + remainder[idx+len(amt):]
+            # Cut the last 3 amounts (fees, amount, balance) out of the rest
+            # of the line by their match positions
+            pieces = []
+            pos = 0
+            for match in amount_matches[-3:]:
+                pieces.append(body[pos:match.start()])
+                pos = match.end()
+            pieces.append(body[pos:])
+            remainder = ''.join(pieces)
 
             # Split remainder into parts
             parts = remainder.strip().split()
@@ -201,9 +420,8 @@ class TableParserV3:
                 return None
 
             # Skip header rows
-            if 'balance brought forward' in description.lower():
-                return None
-            if 'interest rate' in description.lower():
+            description_lower = description.lower()
+            if any(header in description_lower for header in self.HEADER_PHRASES):
                 return None
 
             return BankTransaction(
@@ -225,14 +443,20 @@ class TableParserV3:
         if not text:
             return False
 
-        non_ascii = sum(1 for char in text if ord(char) > 127)
+        text = text[:self.GARBLED_SAMPLE_CHARS]
+
+        # Pure-ASCII text (the common case) can only contain the '???' marker
+        if text.isascii():
+            return '???' in text
+
+        # Count non-ASCII characters in C: encoding drops exactly those
         total = len(text)
+        non_ascii = total - len(text.encode('ascii', 'ignore'))
 
-        if total > 0 and (non_ascii / total) > threshold:
+        if (non_ascii / total) > threshold:
             return True
 
-        garbled_indicators = ['???', 'ï¿½', '¶', '†', 'ƒ', '⁄', '…', '§', '•']
-        if any(indicator in text for indicator in garbled_indicators):
+        if any(indicator in text for indicator in self.GARBLED_INDICATORS):
             return True
 
         return False
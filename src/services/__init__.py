@@ -1,5 +1,6 @@
 """Services module"""
 
 from .categorization import CategorizationService
+from .parse_cache import ParseCache
 
-__all__ = ['CategorizationService']
+__all__ = ['CategorizationService', 'ParseCache']
@@ -8,18 +8,52 @@ This service handles:
 """
 
 import re
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_, case, func, literal, or_
+from sqlalchemy.dialects import postgresql, sqlite
 
 from ..db.models import TransactionPattern, Category
 
+# Optional: pyahocorasick finds every contains-pattern in a description in
+# one pass over the text; without it each pattern is tested with `in`
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+@lru_cache(maxsize=1024)
+def _compile_pattern(pattern_value: str) -> Optional[re.Pattern]:
+    """Compile a learned regex pattern once per process (None if invalid)"""
+    try:
+        return re.compile(pattern_value, re.IGNORECASE)
+    except re.error:
+        return None
+
+
+# Words too common in descriptions to identify a merchant, for learn_pattern
+_COMMON_WORDS = frozenset({'PURCHASE', 'LOCAL', 'DEBIT', 'CREDIT'})
+
+# Dialect inserts supporting ON CONFLICT DO UPDATE, for learn_pattern
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def _escape_like(value):
+    """Escape LIKE wildcards in a SQL string expression (escape char: backslash)"""
+    for char in ('\\', '%', '_'):
+        value = func.replace(value, char, '\\' + char)
+    return value
+
 
 class CategorizationService:
     """Service for transaction categorization and pattern learning"""
 
     def __init__(self, db: Session):
         self.db = db
+        # Category id -> name, loaded on first use (see _get_category_name)
+        self._category_names: Optional[Dict[int, str]] = None
 
     def find_suggestions(self, original_description: str, reference: str = "") -> Dict:
         """
@@ -35,50 +69,142 @@ class CategorizationService:
         # Combine description and reference for pattern matching
         search_text = f"{original_description} {reference}".lower()
 
-        # Find matching patterns ordered by confidence
+        # Match contains/starts_with/reference_exact patterns in the database
+        # so only candidate rows are loaded; regexes are still tested here.
+        # match_value was lowercased in Python, like search_text
+        value = TransactionPattern.match_value
+        search = literal(search_text)
         patterns = self.db.query(TransactionPattern).filter(
-            TransactionPattern.confidence > 0.3  # Minimum confidence threshold
+            TransactionPattern.confidence > 0.3,  # Minimum confidence threshold
+            or_(
+                and_(
+                    TransactionPattern.pattern_type == 'contains',
+                    search.like('%' + _escape_like(value) + '%', escape='\\')
+                ),
+                and_(
+                    TransactionPattern.pattern_type == 'starts_with',
+                    func.substr(search, 1, func.length(value)) == value
+                ),
+                and_(
+                    TransactionPattern.pattern_type == 'reference_exact',
+                    value == reference.lower()
+                ),
+                TransactionPattern.pattern_type == 'regex'
+            )
         ).order_by(TransactionPattern.confidence.desc()).all()
 
+        # Candidates arrive highest confidence first, so the first match wins
         best_match = None
-        best_confidence = 0.0
 
         for pattern in patterns:
-            matched = False
-
-            if pattern.pattern_type == 'contains':
-                if pattern.pattern_value.lower() in search_text:
-                    matched = True
-
-            elif pattern.pattern_type == 'starts_with':
-                if search_text.startswith(pattern.pattern_value.lower()):
-                    matched = True
-
-            elif pattern.pattern_type == 'regex':
-                try:
-                    if re.search(pattern.pattern_value, search_text, re.IGNORECASE):
-                        matched = True
-                except re.error:
-                    # Invalid regex, skip
+            if pattern.pattern_type == 'regex':
+                compiled = _compile_pattern(pattern.pattern_value)
+                if compiled is None or not compiled.search(search_text):
+                    # No match, or invalid regex
                     continue
 
-            elif pattern.pattern_type == 'reference_exact':
-                if pattern.pattern_value.lower() == reference.lower():
-                    matched = True
+            best_match = pattern
+            break
+
+        return self._suggestion(best_match)
+
+    def find_suggestions_batch(self, transactions: List[Dict]) -> List[Dict]:
+        """
+        Find suggestions for many transactions against one load of the patterns.
+
+        Args:
+            transactions: Dicts with 'description' and optional 'reference'
 
-            if matched and pattern.confidence > best_confidence:
-                best_match = pattern
-                best_confidence = pattern.confidence
+        Returns:
+            One suggestion dict per transaction (see find_suggestions), in order
+        """
+        patterns = self.db.query(TransactionPattern).filter(
+            TransactionPattern.confidence > 0.3  # Minimum confidence threshold
+        ).order_by(TransactionPattern.confidence.desc()).all()
 
+        # Partition the patterns by type once, lowercasing (or compiling) each
+        # value, so every type is checked in its own tight loop below. A
+        # pattern's rank is its position in confidence order: lowest wins
+        contains, starts_with, regexes = [], [], []
+        references = {}
+        contains_automaton = None
+        if ahocorasick is not None:
+            contains_automaton = ahocorasick.Automaton()
+
+        for rank, pattern in enumerate(patterns):
+            pattern_type = pattern.pattern_type
+
+            if pattern_type == 'regex':
+                compiled = _compile_pattern(pattern.pattern_value)
+                if compiled is not None:  # Skip invalid regexes
+                    regexes.append((rank, pattern, compiled))
+                continue
+
+            value = pattern.pattern_value.lower()
+            if pattern_type == 'contains':
+                if value and contains_automaton is not None:
+                    # Keep the best-ranked pattern for each distinct value
+                    if value not in contains_automaton:
+                        contains_automaton.add_word(value, (rank, pattern))
+                else:
+                    contains.append((rank, pattern, value))
+            elif pattern_type == 'starts_with':
+                starts_with.append((rank, pattern, value))
+            elif pattern_type == 'reference_exact':
+                references.setdefault(value, (rank, pattern))
+
+        if contains_automaton is not None and len(contains_automaton):
+            contains_automaton.make_automaton()
+        else:
+            contains_automaton = None
+
+        no_match = (len(patterns), None)
+        suggestions = []
+        for txn in transactions:
+            reference = (txn.get('reference') or "").lower()
+            search_text = f"{txn['description']} {reference}".lower()
+
+            # Cheapest checks first; each later loop stops at the best rank
+            # found so far, since nothing after it can win
+            best_rank, best_match = references.get(reference, no_match)
+
+            if contains_automaton is not None:
+                for _, found in contains_automaton.iter(search_text):
+                    if found[0] < best_rank:
+                        best_rank, best_match = found
+
+            for rank, pattern, value in starts_with:
+                if rank >= best_rank:
+                    break
+                if search_text.startswith(value):
+                    best_rank, best_match = rank, pattern
+                    break
+
+            for rank, pattern, value in contains:
+                if rank >= best_rank:
+                    break
+                if value in search_text:
+                    best_rank, best_match = rank, pattern
+                    break
+
+            for rank, pattern, compiled in regexes:
+                if rank >= best_rank:
+                    break
+                if compiled.search(search_text):
+                    best_rank, best_match = rank, pattern
+                    break
+
+            suggestions.append(self._suggestion(best_match))
+
+        return suggestions
+
+    def _suggestion(self, best_match: Optional[TransactionPattern]) -> Dict:
+        """Build the suggestion dict for the winning pattern (or no match)"""
         if best_match:
             # Get category name if available
             category_name = None
             if best_match.category_id:
-                category = self.db.query(Category).filter(
-                    Category.id == best_match.category_id
-                ).first()
-                if category:
-                    category_name = category.name
+                category_name = self._get_category_name(best_match.category_id)
 
             return {
                 'suggested_description': best_match.suggested_description,
@@ -96,6 +222,12 @@ class CategorizationService:
             'pattern_matched': None
         }
 
+    def _get_category_name(self, category_id: int) -> Optional[str]:
+        """Look up a category name, loading all names in one query on first use"""
+        if self._category_names is None:
+            self._category_names = dict(self.db.query(Category.id, Category.name).all())
+        return self._category_names.get(category_id)
+
     def learn_pattern(
         self,
         original_description: str,
@@ -124,11 +256,15 @@ class CategorizationService:
         # Look for distinctive keywords (e.g., "MTN", "CHECKERS", merchant names)
         words = original_description.split()
         for word in words:
+            # Too short to be distinctive even before stripping punctuation
+            if len(word) < 5:
+                continue
+
             word_clean = word.strip('*.,').upper()
             # If word is distinctive (5+ chars, alphanumeric, not common words)
             if (len(word_clean) >= 5 and
                 any(c.isalpha() for c in word_clean) and
-                word_clean not in ['PURCHASE', 'LOCAL', 'DEBIT', 'CREDIT']):
+                word_clean not in _COMMON_WORDS):
 
                 patterns_to_create.append({
                     'type': 'contains',
@@ -138,34 +274,37 @@ class CategorizationService:
                 })
                 break  # Only take first distinctive word
 
-        # Create or update patterns
-        for pattern_data in patterns_to_create:
-            # Check if pattern already exists
-            existing = self.db.query(TransactionPattern).filter(
-                TransactionPattern.pattern_type == pattern_data['type'],
-                TransactionPattern.pattern_value == pattern_data['value']
-            ).first()
-
-            if existing:
-                # Update existing pattern
-                existing.suggested_description = pattern_data['description']
-                existing.category_id = pattern_data['category_id']
-                existing.times_applied += 1
-                existing.times_accepted += 1
-                # Increase confidence (up to 1.0)
-                existing.confidence = min(1.0, existing.confidence + 0.1)
-            else:
-                # Create new pattern
-                new_pattern = TransactionPattern(
-                    pattern_type=pattern_data['type'],
-                    pattern_value=pattern_data['value'],
-                    suggested_description=pattern_data['description'],
-                    category_id=pattern_data['category_id'],
-                    confidence=0.7,  # Start with medium confidence
-                    times_applied=1,
-                    times_accepted=1
-                )
-                self.db.add(new_pattern)
+        # Create or update patterns in one upsert on (pattern_type, pattern_value)
+        if patterns_to_create:
+            insert = _UPSERT_INSERTS[self.db.get_bind().dialect.name]
+            stmt = insert(TransactionPattern)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['pattern_type', 'pattern_value'],
+                set_={
+                    'suggested_description': stmt.excluded.suggested_description,
+                    'category_id': stmt.excluded.category_id,
+                    'times_applied': TransactionPattern.times_applied + 1,
+                    'times_accepted': TransactionPattern.times_accepted + 1,
+                    # Increase confidence (up to 1.0)
+                    'confidence': case(
+                        (TransactionPattern.confidence + 0.1 > 1.0, 1.0),
+                        else_=TransactionPattern.confidence + 0.1
+                    ),
+                    'updated_at': func.now()
+                }
+            )
+            self.db.execute(stmt, [
+                {
+                    'pattern_type': pattern_data['type'],
+                    'pattern_value': pattern_data['value'],
+                    'suggested_description': pattern_data['description'],
+                    'category_id': pattern_data['category_id'],
+                    'confidence': 0.7,  # New patterns start with medium confidence
+                    'times_applied': 1,
+                    'times_accepted': 1
+                }
+                for pattern_data in patterns_to_create
+            ])
 
         self.db.commit()
 
@@ -221,6 +360,7 @@ class CategorizationService:
         self.db.add(category)
         self.db.commit()
         self.db.refresh(category)
+        self._category_names = None
         return category.id
 
     def update_category(self, category_id: int, name: Optional[str] = None,
@@ -239,6 +379,7 @@ class CategorizationService:
             category.icon = icon
 
         self.db.commit()
+        self._category_names = None
         return True
 
     def seed_default_categories(self):
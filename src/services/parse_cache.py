@@ -0,0 +1,52 @@
+"""
+In-process cache for parsed bank statements
+
+Re-uploading the same PDF (retries after a client timeout, repeated previews
+during review) would otherwise repeat the full text extraction/OCR pipeline.
+Results are kept in a small LRU with a time-to-live, keyed by the file hash
+(SHA-256, computed anyway while spooling the upload) and the parse options.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class ParseCache:
+    """Thread-safe LRU cache with per-entry TTL for parse results"""
+
+    def __init__(self, maxsize: int = 64, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Return the cached result for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, result = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key: Hashable, result: Dict):
+        """Store result under key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()